@@ -1,20 +1,23 @@
 # app.py
-from flask import Flask, render_template, request, jsonify, send_from_directory, Response, session, make_response
+from flask import Flask, render_template, request, jsonify, send_from_directory, send_file, Response, session, make_response, url_for
 from pathlib import Path
 import threading
 import os
 import sys
 import logging
 import uuid 
-import zipfile 
 import shutil 
 import time 
 import json 
+import mimetypes
 from flask_apscheduler import APScheduler 
 from datetime import datetime # For sitemap lastmod
 
 try:
-    from kuku_downloader import KuKu 
+    from kuku_downloader import KuKu, AuthPreflightError
+    from download_worker import album_job, run_album_job_in_process
+    from static_assets import StaticAssetManifest
+    from synthetic_load import SyntheticShow
 except ImportError as e:
     print(f"CRITICAL ERROR: Error importing KuKu class: {e}")
     print("Ensure kuku_downloader.py is in the same directory as app.py or correctly in PYTHONPATH.")
@@ -25,7 +28,8 @@ class Config:
     SECRET_KEY = os.environ.get('FLASK_SECRET_KEY', os.urandom(32))
 
 
-app = Flask(__name__)
+# Flask's built-in /static route is disabled so serve_static_files (below) handles every static request
+app = Flask(__name__, static_folder=None)
 app.config.from_object(Config())
 
 APP_ROOT = Path(__file__).resolve().parent
@@ -42,16 +46,138 @@ DOWNLOAD_BASE_DIR = PERSISTENT_STORAGE_ROOT / "Downloaded_Shows_Content"
 ZIP_STORAGE_DIR = PERSISTENT_STORAGE_ROOT / "_zips_for_user_download"    
 DEFAULT_COOKIES_FILE = APP_ROOT / "cookies.json" 
 
-DOWNLOAD_BASE_DIR.mkdir(parents=True, exist_ok=True)
-ZIP_STORAGE_DIR.mkdir(parents=True, exist_ok=True)
+# Fingerprinted + precompressed static assets, generated once at startup (no build step; see bootstrap_web_process)
+STATIC_DIR = APP_ROOT / "static"
+STATIC_BUILD_DIR = APP_ROOT / "_static_build"
+STATIC_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+static_manifest = StaticAssetManifest(STATIC_DIR, STATIC_BUILD_DIR)
 
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s - %(levelname)s - %(threadName)s - %(message)s',
                     handlers=[logging.StreamHandler(sys.stdout)]) 
 
+# Disk budget for raw content + ZIP copies. STORAGE_BUDGET_GB unset -> limited only by free disk space.
+STORAGE_BUDGET_GB_STR = os.environ.get('STORAGE_BUDGET_GB')
+STORAGE_BUDGET_BYTES = int(float(STORAGE_BUDGET_GB_STR) * 1024**3) if STORAGE_BUDGET_GB_STR else None
+STORAGE_MIN_FREE_BYTES = int(float(os.environ.get('STORAGE_MIN_FREE_MB', '512')) * 1024**2)
+STORAGE_QUEUE_TIMEOUT_SECONDS = int(float(os.environ.get('STORAGE_QUEUE_TIMEOUT_MINUTES', '30')) * 60)
+ZIP_SIZE_RATIO = 1.0 # m4a barely deflates, so the ZIP copy is about as big as the raw content
+
+# "thread" runs downloading/tagging/zipping in the web process; "process" runs it in a
+# spawned worker process per task so the GIL-heavy work does not slow down HTTP requests.
+DOWNLOAD_EXECUTION_MODE = os.environ.get('DOWNLOAD_EXECUTION_MODE', 'thread').lower()
+if DOWNLOAD_EXECUTION_MODE not in ('thread', 'process'):
+    logging.warning(f"Unknown DOWNLOAD_EXECUTION_MODE '{DOWNLOAD_EXECUTION_MODE}', falling back to 'thread'.")
+    DOWNLOAD_EXECUTION_MODE = 'thread'
+
+# Benchmark-only: accept synthetic://... URLs that run CPU-bound fake downloads (see bench_status_latency.py)
+SYNTHETIC_LOAD_ENABLED = os.environ.get('KUKU_SYNTHETIC_LOAD') == '1'
+
 download_tasks_status = {} 
+# Statuses of a task whose worker thread is still running (duplicate check, cleanup keeps them)
+ACTIVE_TASK_STATUSES = ("processing_queued", "processing", "queued_for_space")
 scheduler = APScheduler()
 
+class StorageRefusedError(Exception):
+    """Raised when a task's estimated size can never fit (or did not fit in time) in the storage budget."""
+
+class StorageBudget:
+    """
+    Admission control for download tasks: each task reserves its estimated size
+    (raw content + ZIP) before it starts and releases it when it ends. Outstanding
+    reservations shrink as the task's own files appear on disk, so running tasks
+    are not counted twice. Disk walks run outside the lock and are cached briefly.
+    """
+    USAGE_CACHE_TTL_S = 5
+
+    def __init__(self, roots, budget_bytes=None, min_free_bytes=0):
+        self.roots = [Path(r) for r in roots]
+        self.budget_bytes = budget_bytes
+        self.min_free_bytes = min_free_bytes
+        self._reservations = {} # task_id -> {"bytes", "paths", "created"}
+        self._cond = threading.Condition()
+        self._usage_lock = threading.Lock() # serialises disk walks; never held together with _cond
+        self._usage_cache = (0.0, 0, {}) # (measured_at, used_bytes, {reserved path: bytes})
+
+    @staticmethod
+    def _path_size(path: Path) -> int:
+        try:
+            if path.is_file(): return path.stat().st_size
+            if path.is_dir(): return sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+        except OSError: pass
+        return 0
+
+    def _measure(self):
+        """(used_bytes, {reserved path: bytes}), re-walking the trees at most every USAGE_CACHE_TTL_S."""
+        with self._usage_lock:
+            measured_at, used, path_sizes = self._usage_cache
+            if time.time() - measured_at < self.USAGE_CACHE_TTL_S: return used, path_sizes
+            with self._cond: paths = {p for r in self._reservations.values() for p in r["paths"]}
+            used = sum(self._path_size(r) for r in self.roots)
+            path_sizes = {p: self._path_size(p) for p in paths}
+            self._usage_cache = (time.time(), used, path_sizes)
+            return used, path_sizes
+
+    def _invalidate_usage(self):
+        with self._usage_lock: self._usage_cache = (0.0, 0, {})
+
+    def used_bytes(self) -> int: return self._measure()[0]
+
+    @staticmethod
+    def _outstanding_bytes(res, path_sizes) -> int:
+        # Paths not measured yet (brand new reservation) count as empty: conservative
+        return max(0, res["bytes"] - sum(path_sizes.get(p, 0) for p in res["paths"]))
+
+    def _ceiling_bytes(self) -> int:
+        if self.budget_bytes is not None: return self.budget_bytes
+        return shutil.disk_usage(self.roots[0]).total - self.min_free_bytes
+
+    def _fits(self, nbytes: int, used: int, path_sizes) -> bool:
+        """Caller holds self._cond; used/path_sizes come from _measure() taken outside it."""
+        outstanding = sum(self._outstanding_bytes(r, path_sizes) for r in self._reservations.values())
+        free_for_us = shutil.disk_usage(self.roots[0]).free - self.min_free_bytes
+        if outstanding + nbytes > free_for_us: return False
+        return self.budget_bytes is None or used + outstanding + nbytes <= self.budget_bytes
+
+    def reserve(self, task_id: str, nbytes: int, paths, timeout_s: float, on_queued=None):
+        """Blocks until nbytes fit, then records the reservation. Raises StorageRefusedError."""
+        if nbytes > self._ceiling_bytes():
+            raise StorageRefusedError(f"Show needs about {nbytes/1024**2:.0f} MB, more than the storage budget of {self._ceiling_bytes()/1024**2:.0f} MB.")
+        deadline = time.time() + timeout_s
+        queued = False
+        while True:
+            used, path_sizes = self._measure()
+            with self._cond:
+                if self._fits(nbytes, used, path_sizes):
+                    self._reservations[task_id] = {"bytes": nbytes, "paths": [Path(p) for p in paths], "created": time.time()}
+                    return
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise StorageRefusedError(f"Not enough disk space for about {nbytes/1024**2:.0f} MB after waiting {timeout_s/60:.0f} min. Please try again later.")
+                if queued: self._cond.wait(timeout=min(remaining, 15)) # re-check periodically: cleanup frees space without notifying
+            if not queued and on_queued: on_queued()
+            queued = True
+
+    def release(self, task_id: str):
+        # Invalidate first: woken waiters must re-measure, since the released task's files now count as plain usage
+        self._invalidate_usage()
+        with self._cond:
+            if self._reservations.pop(task_id, None) is not None: self._cond.notify_all()
+
+    def snapshot(self) -> dict:
+        used, path_sizes = self._measure()
+        with self._cond:
+            reservations = {tid: {"reserved_bytes": r["bytes"], "outstanding_bytes": self._outstanding_bytes(r, path_sizes), "created": r["created"]}
+                            for tid, r in self._reservations.items()}
+        disk = shutil.disk_usage(self.roots[0])
+        return {"budget_bytes": self.budget_bytes, "min_free_bytes": self.min_free_bytes,
+                "used_bytes": used, "disk_free_bytes": disk.free, "disk_total_bytes": disk.total,
+                "reserved_bytes": sum(r["reserved_bytes"] for r in reservations.values()),
+                "outstanding_bytes": sum(r["outstanding_bytes"] for r in reservations.values()),
+                "reservations": reservations}
+
+storage_budget = StorageBudget([DOWNLOAD_BASE_DIR, ZIP_STORAGE_DIR], STORAGE_BUDGET_BYTES, STORAGE_MIN_FREE_BYTES)
+
 def cleanup_old_files_job():
     with app.app_context(): 
         logging.info("SCHEDULER: Running cleanup job for old files...")
@@ -94,23 +220,47 @@ def cleanup_old_files_job():
         max_task_status_age_seconds = max_age_seconds_zip + (15 * 60) 
         for task_id, task_info in list(download_tasks_status.items()):
             task_timestamp = task_info.get("timestamp", 0) 
-            if task_info.get("status") != "processing" and (now - task_timestamp) > max_task_status_age_seconds:
+            if task_info.get("status") not in ACTIVE_TASK_STATUSES and (now - task_timestamp) > max_task_status_age_seconds:
                 tasks_to_delete.append(task_id)
         for task_id in tasks_to_delete:
             if task_id in download_tasks_status: del download_tasks_status[task_id]; cleaned_tasks +=1
         if cleaned_tasks > 0: logging.info(f"SCHEDULER: Cleaned up {cleaned_tasks} old task status entries.")
+        for task_id in list(storage_budget.snapshot()["reservations"]):
+            if download_tasks_status.get(task_id, {}).get("status") in (None, "complete", "error"):
+                storage_budget.release(task_id)
+                logging.info(f"SCHEDULER: Released stale storage reservation for task {task_id}.")
         logging.info("SCHEDULER: Cleanup job finished.")
 
-if not scheduler.running:
-    scheduler.init_app(app)
-    scheduler.start()
-    logging.info("APScheduler initialized and started.")
-    cleanup_job_interval_minutes = 30 
-    trigger_args = {'minutes': cleanup_job_interval_minutes}
-    if not scheduler.get_job('cleanup_files_job_id'):
-        scheduler.add_job(id='cleanup_files_job_id', func=cleanup_old_files_job, trigger='interval', **trigger_args) 
-        logging.info(f"SCHEDULER: Cleanup job scheduled with interval: {trigger_args}")
-    else: logging.info("SCHEDULER: Cleanup job already scheduled.")
+def bootstrap_web_process():
+    """
+    Startup side effects that belong to the web process only: storage folders, the static
+    asset build and the cleanup scheduler. Spawned download workers (DOWNLOAD_EXECUTION_MODE=process)
+    re-import the parent's main script as '__mp_main__', so when this file is run directly
+    they must skip this - otherwise each worker would run its own cleanup job.
+    """
+    DOWNLOAD_BASE_DIR.mkdir(parents=True, exist_ok=True)
+    ZIP_STORAGE_DIR.mkdir(parents=True, exist_ok=True)
+    static_manifest.build()
+    if not scheduler.running:
+        scheduler.init_app(app)
+        scheduler.start()
+        logging.info("APScheduler initialized and started.")
+        cleanup_job_interval_minutes = 30 
+        trigger_args = {'minutes': cleanup_job_interval_minutes}
+        if not scheduler.get_job('cleanup_files_job_id'):
+            scheduler.add_job(id='cleanup_files_job_id', func=cleanup_old_files_job, trigger='interval', **trigger_args) 
+            logging.info(f"SCHEDULER: Cleanup job scheduled with interval: {trigger_args}")
+        else: logging.info("SCHEDULER: Cleanup job already scheduled.")
+
+if __name__ != '__mp_main__':
+    bootstrap_web_process()
+
+@app.context_processor
+def static_asset_helpers():
+    def static_url(filename): return url_for('serve_static_files', filename=static_manifest.url_name(filename))
+    def static_srcset(filename):
+        return ", ".join(f"{url_for('serve_static_files', filename=name)} {width}w" for name, width in static_manifest.srcset_names(filename))
+    return {"static_url": static_url, "static_srcset": static_srcset}
 
 @app.route('/')
 def index(): return render_template('index.html')
@@ -207,9 +357,19 @@ def start_download_route():
     kuku_url = data.get('kuku_url')
     if not kuku_url: return jsonify({"status": "error", "message": "URL is required."}), 400
 
+    variant_policy = (data.get('variant_policy') or 'highest').lower()
+    target_kbps = data.get('target_kbps')
+    if variant_policy not in KuKu.VARIANT_POLICIES:
+        return jsonify({"status": "error", "message": f"variant_policy must be one of: {', '.join(KuKu.VARIANT_POLICIES)}."}), 400
+    if variant_policy == 'closest':
+        try: target_kbps = float(target_kbps)
+        except (TypeError, ValueError): target_kbps = 0
+        if target_kbps <= 0: return jsonify({"status": "error", "message": "target_kbps must be a positive number for the 'closest' policy."}), 400
+    else: target_kbps = None
+
     task_id = str(uuid.uuid4())
     for t_info in download_tasks_status.values():
-        if t_info.get("url")==kuku_url and t_info.get("status")=="processing":
+        if t_info.get("url")==kuku_url and t_info.get("status") in ACTIVE_TASK_STATUSES:
             return jsonify({"status":"warning", "message":f"Download for {kuku_url} is already processing."}), 409
 
     download_path_for_kuku_instance = DOWNLOAD_BASE_DIR 
@@ -220,60 +380,94 @@ def start_download_route():
     
     logging.info(f"Download request for URL: {kuku_url} -> Task ID: {task_id}")
         
-    def download_task_wrapper(app_ctx, current_task_id, url, srv_cookies_p, user_cookies_l, dl_path_kuku):
+    def download_task_wrapper(app_ctx, current_task_id, url, srv_cookies_p, user_cookies_l, dl_path_kuku, v_policy, v_target_kbps):
         threading.current_thread().name = f"Downloader-{current_task_id[:8]}"
-        start_time = time.time() 
-        download_tasks_status[current_task_id] = {
-            "status": "processing", "message": "Initializing...", "show_title": "Fetching...", 
-            "url": url, "zip_filename": None, "processed_count": 0, "total_episodes": 0,
-            "current_episode_title": None, "episode_updates": [], "timestamp": start_time
-        }
+        # The route created this task's entry before starting the thread; only update it here
+        download_tasks_status[current_task_id].update({"status": "processing", "message": "Initializing...", "timestamp": time.time()})
         downloader = None 
         try:
             with app_ctx: 
-                downloader = KuKu(url=url, cookies_file_path=srv_cookies_p, user_cookies_list=user_cookies_l, show_content_download_root_dir=dl_path_kuku)
+                if SYNTHETIC_LOAD_ENABLED and url.startswith(SyntheticShow.URL_PREFIX):
+                    downloader = SyntheticShow(url, dl_path_kuku)
+                else:
+                    downloader = KuKu(url=url, cookies_file_path=srv_cookies_p, user_cookies_list=user_cookies_l, show_content_download_root_dir=dl_path_kuku, variant_policy=v_policy, target_kbps=v_target_kbps)
                 show_title = downloader.metadata.get('title', 'Unknown Show')
                 total_eps = downloader.metadata.get('nEpisodes', 0)
                 download_tasks_status[current_task_id].update({"show_title":show_title,"total_episodes":total_eps,"message":f"Preparing '{show_title}'...","timestamp":time.time()})
 
-                def episode_progress_cb(episode_title: str, success: bool, processed_count: int, total_episodes: int, status_message: str):
+                def episode_progress_cb(episode_title: str, success: bool, processed_count: int, total_episodes: int, status_message: str, variant_selections: dict | None = None):
                     task_data = download_tasks_status.get(current_task_id)
                     if task_data:
+                        # Per-episode selections are kept in full (never trimmed like episode_updates)
+                        for ep_key, selection in (variant_selections or {}).items():
+                            task_data.setdefault("variant_selections", {})[ep_key] = selection
+                            if selection.get("estimated_size_bytes"): task_data["estimated_total_bytes"] = task_data.get("estimated_total_bytes", 0) + selection["estimated_size_bytes"]
                         task_data.update({"processed_count":processed_count,"total_episodes":total_episodes,"current_episode_title":episode_title,"message":f"Ep {processed_count}/{total_episodes}: '{episode_title[:25]}...'","timestamp":time.time()})
-                        task_data["episode_updates"].append({"title":episode_title,"status_message":status_message,"success":success,"processed_count":processed_count,"total_episodes":total_episodes})
+                        task_data.setdefault("episode_updates", []).append({"title":episode_title,"status_message":status_message,"success":success,"processed_count":processed_count,"total_episodes":total_episodes})
                         if len(task_data["episode_updates"]) > 30: task_data["episode_updates"] = task_data["episode_updates"][-30:]
                 
-                downloader.downAlbum(episode_status_callback=episode_progress_cb) 
-                album_out_path = downloader.album_path 
-                if not album_out_path or not album_out_path.is_dir(): raise Exception("Album path missing.")
-
+                episodes = downloader.fetch_all_episodes()
+                # Auth is checked before sizing/queueing so bad cookies fail in seconds, not after a wait for disk space
+                download_tasks_status[current_task_id].update({"message":f"Checking authentication for '{show_title}'...","timestamp":time.time()})
+                downloader.preflight_auth(episodes, KuKu.episode_workers())
                 zip_fn = f"{KuKu.clean(show_title)}_{downloader.showID}.zip"
                 zip_out_path = ZIP_STORAGE_DIR / zip_fn
-                download_tasks_status[current_task_id].update({"message":f"Zipping '{show_title}'...","timestamp":time.time()})
-                with zipfile.ZipFile(zip_out_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
-                    for item in album_out_path.rglob('*'): 
-                        if item.is_file(): zf.write(item, item.relative_to(album_out_path))
+                audio_est = downloader.estimate_download_size_bytes(episodes) if episodes else 0
+                reserve_bytes = int(audio_est * (1 + ZIP_SIZE_RATIO))
+                download_tasks_status[current_task_id].update({"hls_variants":downloader.hls_variants,"reserved_bytes":reserve_bytes,"message":f"Checking disk space for '{show_title}' (~{reserve_bytes/1024**2:.0f} MB)...","timestamp":time.time()})
+
+                def on_queued_for_space():
+                    logging.info(f"Task {current_task_id} queued: waiting for {reserve_bytes/1024**2:.0f} MB of storage.")
+                    download_tasks_status[current_task_id].update({"status":"queued_for_space","message":f"Waiting for disk space (~{reserve_bytes/1024**2:.0f} MB needed)...","timestamp":time.time()})
+
+                storage_budget.reserve(current_task_id, reserve_bytes, [downloader.album_folder_path(), zip_out_path],
+                                       STORAGE_QUEUE_TIMEOUT_SECONDS, on_queued=on_queued_for_space)
+                download_tasks_status[current_task_id].update({"status":"processing","message":f"Preparing '{show_title}'...","timestamp":time.time()})
+
+                def task_status_cb(message: str):
+                    download_tasks_status[current_task_id].update({"message":message,"timestamp":time.time()})
+
+                run_job = run_album_job_in_process if DOWNLOAD_EXECUTION_MODE == 'process' else album_job
+                run_job(downloader, episodes, zip_out_path, episode_status_callback=episode_progress_cb, status_callback=task_status_cb)
                 download_tasks_status[current_task_id].update({"status":"complete","message":"Download complete! ZIP ready.","zip_filename":zip_fn,"processed_count":total_eps,"timestamp":time.time()})
                 logging.info(f"Thread: ZIP created: {zip_fn} (Task: {current_task_id})")
+        except StorageRefusedError as e:
+            logging.warning(f"Storage admission refused (Task {current_task_id}): {e}")
+            title_err = downloader.metadata.get('title','Failed') if downloader else 'Failed (init)'
+            download_tasks_status[current_task_id].update({"status":"error","error_kind":"storage","message":str(e),"show_title":title_err,"timestamp":time.time()})
+        except AuthPreflightError as e:
+            logging.warning(f"Auth preflight failed (Task {current_task_id}): {e}")
+            title_err = downloader.metadata.get('title','Failed') if downloader else 'Failed (init)'
+            download_tasks_status[current_task_id].update({"status":"error","error_kind":"auth_preflight","message":f"Authentication check failed: {e}","show_title":title_err,"timestamp":time.time()})
         except Exception as e:
             logging.error(f"❌ Thread Error (Task {current_task_id}): {e}", exc_info=True)
             title_err = downloader.metadata.get('title','Failed') if downloader else 'Failed (init)'
             download_tasks_status[current_task_id].update({"status":"error","message":str(e),"show_title":title_err,"timestamp":time.time()})
         finally:
+            storage_budget.release(current_task_id)
             final_stat = download_tasks_status.get(current_task_id,{}).get('status','unknown')
             logging.info(f"Thread: Task {current_task_id} for {url} ended: {final_stat}")
 
+    # Full entry exists before the thread starts, so /status and the wrapper always see the same keys
+    download_tasks_status[task_id] = {
+        "status": "processing_queued", "message": "Download initiated...", "task_id": task_id,
+        "url": kuku_url, "show_title": "Fetching...", "zip_filename": None, "processed_count": 0, "total_episodes": 0,
+        "current_episode_title": None, "episode_updates": [], "timestamp": time.time(),
+        "variant_policy": variant_policy, "target_kbps": target_kbps, "estimated_total_bytes": 0,
+        "hls_variants": [], "variant_selections": {}
+    }
     try:
         thread = threading.Thread(target=download_task_wrapper, name=f"TaskMgr-{task_id[:8]}",
                                   args=(app.app_context(), task_id, kuku_url, 
                                         server_default_cookies_file, 
                                         user_specific_cookies_list,  
-                                        download_path_for_kuku_instance)) 
+                                        download_path_for_kuku_instance,
+                                        variant_policy, target_kbps)) 
         thread.start()
-        download_tasks_status[task_id] = {"status": "processing_queued", "message": "Download initiated...", "task_id": task_id, "url": kuku_url, "show_title": "Fetching...", "episode_updates": [], "timestamp": time.time()}
         return jsonify({"status": "processing_queued", "message": f"Download for {kuku_url} initiated.", "task_id": task_id})
     except Exception as e:
         logging.error(f"❌ Error initializing thread for {kuku_url}: {e}", exc_info=True)
+        download_tasks_status.pop(task_id, None)
         return jsonify({"status": "error", "message": f"Failed to start download: {str(e)}"}), 500
 
 @app.route('/status/<task_id>', methods=['GET'])
@@ -304,6 +498,10 @@ def fetch_zip_file(filename_to_serve):
         logging.error(f"Error serving ZIP '{safe_filename}': {e}",exc_info=True)
         return jsonify({"status":"error","message":"Could not serve ZIP."}),500
 
+@app.route('/api/storage', methods=['GET'])
+def storage_status():
+    return jsonify(storage_budget.snapshot())
+
 @app.route('/api/data', methods=['GET']) 
 def api_data():
     logging.info("Placeholder /api/data endpoint was reached.")
@@ -311,7 +509,15 @@ def api_data():
 
 @app.route('/static/<path:filename>')
 def serve_static_files(filename):
-    return send_from_directory(str(APP_ROOT / 'static'), filename)
+    asset = static_manifest.resolve(filename, request.headers.get('Accept-Encoding', ''))
+    if asset is None: # Plain (non-fingerprinted) name: served as before, revalidated by the browser
+        return send_from_directory(str(STATIC_DIR), filename)
+    file_path, encoding = asset
+    response = send_file(file_path, mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream', conditional=True)
+    response.headers['Cache-Control'] = f"public, max-age={STATIC_IMMUTABLE_MAX_AGE}, immutable"
+    response.headers['Vary'] = 'Accept-Encoding'
+    if encoding: response.headers['Content-Encoding'] = encoding
+    return response
 
 if __name__ == '__main__':
     print("KuKu FM Web Downloader - Flask App Starting...")
@@ -319,6 +525,9 @@ if __name__ == '__main__':
     print(f"Persistent storage root (for downloads & zips): {PERSISTENT_STORAGE_ROOT.resolve()}")
     print(f"  -> Raw content will be in: {DOWNLOAD_BASE_DIR.resolve()}")
     print(f"  -> User ZIPs will be in: {ZIP_STORAGE_DIR.resolve()}")
+    print(f"Static assets: {len(static_manifest.source_to_hashed)} fingerprinted, build cache in {STATIC_BUILD_DIR.resolve()}")
+    print(f"Download execution mode: {DOWNLOAD_EXECUTION_MODE}{' (synthetic load URLs enabled)' if SYNTHETIC_LOAD_ENABLED else ''}")
+    print(f"Storage budget: {f'{STORAGE_BUDGET_BYTES/1024**3:.1f} GB' if STORAGE_BUDGET_BYTES else 'free disk space'} (keeping {STORAGE_MIN_FREE_BYTES/1024**2:.0f} MB free)")
     if DEFAULT_COOKIES_FILE.exists(): print(f"Default cookies.json found: {DEFAULT_COOKIES_FILE.resolve()}")
     else: print(f"Default cookies.json not found at {DEFAULT_COOKIES_FILE.resolve()}.")
     app.run(debug=True, host='0.0.0.0', port=5000, threaded=True, use_reloader=False) 
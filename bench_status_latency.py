@@ -0,0 +1,131 @@
+# bench_status_latency.py
+"""
+Measures /status latency while a fixed set of downloads is running.
+
+Synthetic load (no network, no cookies): starts app.py once per execution mode with
+KUKU_SYNTHETIC_LOAD=1 and runs CPU-bound fake downloads (see synthetic_load.py):
+    python bench_status_latency.py --compare-modes --synthetic-shows 4
+
+Real load against an already running app:
+    python bench_status_latency.py --base-url http://127.0.0.1:5000 --cookies my_cookies.json URL1 URL2 ...
+"""
+import argparse
+import json
+import os
+import statistics
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+APP_ROOT = Path(__file__).resolve().parent
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered: return float('nan')
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def measure(base_url, show_urls, cookies_file=None, pollers=8, duration=60.0, warmup=3.0):
+    """Starts one download per URL, then polls /status from `pollers` clients for `duration` seconds."""
+    http = requests.Session()
+    if cookies_file:
+        r = http.post(f"{base_url}/api/set_user_cookies", json={"cookies_json_string": Path(cookies_file).read_text(encoding='utf-8')}, timeout=10)
+        r.raise_for_status()
+
+    task_ids = []
+    for url in show_urls:
+        result = http.post(f"{base_url}/download", json={"kuku_url": url}, timeout=10).json()
+        if not result.get("task_id"): raise SystemExit(f"Could not start download for {url}: {result.get('message')}")
+        task_ids.append(result["task_id"])
+    time.sleep(warmup) # let every task get past setup and into its episode work
+
+    latencies_ms, lock = [], threading.Lock()
+    deadline = time.time() + duration
+
+    def poller(idx):
+        client = requests.Session()
+        while time.time() < deadline:
+            t0 = time.perf_counter()
+            client.get(f"{base_url}/status/{task_ids[idx % len(task_ids)]}", timeout=30)
+            with lock: latencies_ms.append((time.perf_counter() - t0) * 1000)
+
+    threads = [threading.Thread(target=poller, args=(i,)) for i in range(pollers)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    still_running = sum(1 for tid in task_ids if http.get(f"{base_url}/status/{tid}", timeout=30).json().get("status") in ("processing", "processing_queued"))
+    return {
+        "downloads": len(task_ids), "still_running_at_end": still_running,
+        "requests": len(latencies_ms),
+        "p50_ms": round(percentile(latencies_ms, 50), 2),
+        "p95_ms": round(percentile(latencies_ms, 95), 2),
+        "p99_ms": round(percentile(latencies_ms, 99), 2),
+        "max_ms": round(max(latencies_ms), 2) if latencies_ms else None,
+        "mean_ms": round(statistics.fmean(latencies_ms), 2) if latencies_ms else None,
+    }
+
+
+def launch_app(mode, base_url, work_dir: Path):
+    """Runs app.py in its own session (so worker processes can be killed with it), storing downloads in work_dir."""
+    env = {**os.environ, "DOWNLOAD_EXECUTION_MODE": mode, "KUKU_SYNTHETIC_LOAD": "1", "RENDER_DISK_MOUNT_PATH": str(work_dir)}
+    log_path = work_dir / f"app_{mode}.log"
+    log_f = open(log_path, 'w', encoding='utf-8')
+    proc = subprocess.Popen([sys.executable, str(APP_ROOT / "app.py")], cwd=APP_ROOT, env=env, stdout=log_f, stderr=subprocess.STDOUT, start_new_session=True)
+    for _ in range(100):
+        try:
+            if requests.get(f"{base_url}/api/data", timeout=1).ok: return proc, log_f
+        except requests.exceptions.RequestException: pass
+        time.sleep(0.2)
+    stop_app(proc, log_f)
+    raise SystemExit(f"app.py ({mode} mode) did not come up; see {log_path}")
+
+
+def stop_app(proc, log_f):
+    try: os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError: pass
+    proc.wait(timeout=30); log_f.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure /status latency under a fixed concurrent download load.")
+    parser.add_argument("show_urls", nargs="*", help="KuKu FM show URLs to download concurrently (the fixed load).")
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--cookies", help="JSON cookie export to set for the benchmark session.")
+    parser.add_argument("--pollers", type=int, default=8, help="Concurrent /status clients.")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to measure for.")
+    parser.add_argument("--synthetic-shows", type=int, default=0, help="Add N synthetic (CPU-bound, network-free) downloads.")
+    parser.add_argument("--compare-modes", action="store_true", help="Launch app.py in thread and then process mode and measure each (synthetic load only).")
+    args = parser.parse_args()
+
+    # Synthetic shows run a little longer than the measurement so the load stays fixed throughout
+    synthetic_urls = [f"synthetic://bench-{i}?episodes=20&seconds={args.duration + 15:.0f}&mb=1" for i in range(args.synthetic_shows)]
+    show_urls = args.show_urls + synthetic_urls
+    if not show_urls: parser.error("give show URLs and/or --synthetic-shows N")
+
+    if not args.compare_modes:
+        print(json.dumps(measure(args.base_url, show_urls, args.cookies, args.pollers, args.duration), indent=2))
+        return
+
+    if args.show_urls: parser.error("--compare-modes only supports synthetic load")
+    results = {}
+    for mode in ("thread", "process"):
+        with tempfile.TemporaryDirectory(prefix=f"kuku_bench_{mode}_") as work_dir:
+            proc, log_f = launch_app(mode, args.base_url, Path(work_dir))
+            try:
+                print(f"Measuring {mode} mode: {len(show_urls)} synthetic downloads, {args.pollers} pollers, {args.duration:.0f}s...")
+                results[mode] = measure(args.base_url, show_urls, None, args.pollers, args.duration)
+            finally:
+                stop_app(proc, log_f)
+    results["cpu_count"] = os.cpu_count()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
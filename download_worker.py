@@ -0,0 +1,94 @@
+# download_worker.py
+import multiprocessing
+import queue
+import traceback
+import zipfile
+from pathlib import Path
+from typing import Callable, List
+
+from kuku_downloader import KuKu, AuthPreflightError
+
+# Worker processes are spawned (not forked) so they don't inherit the parent's threads or
+# held locks; everything they need is passed in as picklable args. Spawn does re-import the
+# parent's main script as '__mp_main__' (e.g. app.py under 'python app.py'), so that script
+# must keep its startup side effects behind a __name__ != '__mp_main__' guard.
+_MP_CONTEXT = multiprocessing.get_context("spawn")
+
+
+def zip_album(album_path: Path, zip_out_path: Path):
+    """Writes every file under album_path into zip_out_path (paths relative to the album)."""
+    with zipfile.ZipFile(zip_out_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+        for item in album_path.rglob('*'):
+            if item.is_file(): zf.write(item, item.relative_to(album_path))
+
+
+def album_job(downloader: KuKu, episodes: List[dict], zip_out_path: Path,
+              episode_status_callback: Callable[..., None], status_callback: Callable[[str], None]) -> Path:
+    """
+    The CPU-heavy part of a task: downloads + tags every episode, then zips the album.
+    episode_status_callback also receives variant_selections: the HLS variant records
+    (keyed by KuKu.episode_key) added since its previous call.
+    Returns the album folder path.
+    """
+    reported_keys = set()
+    def episode_cb(episode_title: str, success: bool, processed_count: int, total_episodes: int, status_message: str):
+        new_selections = {k: v for k, v in dict(downloader.variant_selections).items() if k not in reported_keys}
+        reported_keys.update(new_selections)
+        episode_status_callback(episode_title=episode_title, success=success, processed_count=processed_count,
+                                total_episodes=total_episodes, status_message=status_message,
+                                variant_selections=new_selections)
+
+    downloader.downAlbum(episode_status_callback=episode_cb, episodes=episodes)
+    album_out_path = downloader.album_path
+    if not album_out_path or not album_out_path.is_dir(): raise Exception("Album path missing.")
+    status_callback(f"Zipping '{downloader.metadata.get('title', 'Unknown Show')}'...")
+    zip_album(album_out_path, zip_out_path)
+    return album_out_path
+
+
+def _process_album_job(downloader: KuKu, episodes: List[dict], zip_out_path: Path, event_queue):
+    """Worker-process entry point: runs album_job and reports everything through event_queue."""
+    try:
+        album_out_path = album_job(downloader, episodes, zip_out_path,
+                                   episode_status_callback=lambda **kw: event_queue.put(("episode", kw)),
+                                   status_callback=lambda msg: event_queue.put(("status", {"message": msg})))
+        event_queue.put(("done", {"album_path": str(album_out_path)}))
+    except AuthPreflightError as e:
+        event_queue.put(("error", {"kind": "auth_preflight", "message": str(e)}))
+    except Exception as e:
+        print(f"SERVER LOG: ❌ Worker process error: {e}\n{traceback.format_exc()}")
+        event_queue.put(("error", {"kind": "exception", "message": str(e)}))
+
+
+def run_album_job_in_process(downloader: KuKu, episodes: List[dict], zip_out_path: Path,
+                             episode_status_callback: Callable[..., None], status_callback: Callable[[str], None],
+                             poll_interval_s: float = 1.0) -> Path:
+    """
+    Same contract as album_job, but the work runs in a separate process. Progress events
+    come back over a multiprocessing queue and are replayed on the callbacks in the calling
+    thread, so the web process only handles small dicts. Errors are re-raised here.
+    """
+    event_queue = _MP_CONTEXT.Queue()
+    proc = _MP_CONTEXT.Process(target=_process_album_job, args=(downloader, episodes, zip_out_path, event_queue),
+                               name=f"KuKuWorker-{downloader.showID}", daemon=True)
+    proc.start()
+    try:
+        while True:
+            try:
+                kind, payload = event_queue.get(timeout=poll_interval_s)
+            except queue.Empty:
+                if not proc.is_alive():
+                    raise Exception(f"Download worker exited unexpectedly (exit code {proc.exitcode}).")
+                continue
+            if kind == "episode": episode_status_callback(**payload)
+            elif kind == "status": status_callback(payload["message"])
+            elif kind == "done":
+                downloader.album_path = Path(payload["album_path"])
+                return downloader.album_path
+            elif kind == "error":
+                if payload["kind"] == "auth_preflight": raise AuthPreflightError(payload["message"])
+                raise Exception(payload["message"])
+    finally:
+        proc.join(timeout=5)
+        if proc.is_alive(): proc.terminate()
+        event_queue.close()
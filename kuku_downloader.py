@@ -1,29 +1,55 @@
 # kuku_downloader.py
+import base64
 import json
 import os
 import re
 import requests
 import subprocess
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urljoin
 from mutagen.mp4 import MP4, MP4Cover
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from tqdm import tqdm 
 import sys 
+import time
 from typing import Callable, Any, List, Dict # Added List and Dict for type hinting
 
+class AuthPreflightError(Exception):
+    """Raised by KuKu.preflight_auth when the session's auth cannot carry the show's downloads."""
+
+
 class KuKu:
+    # Policies for picking one variant out of an HLS master playlist
+    VARIANT_POLICIES = ("highest", "lowest", "closest")
+    # Auth preflight: rough ffmpeg '-c copy' throughput (audio seconds per wall second, per worker)
+    # and the extra headroom CloudFront cookies must have beyond the estimated download time.
+    PREFLIGHT_SPEED_FACTOR = 8.0
+    PREFLIGHT_EXPIRY_MARGIN_S = 120
+    PREFLIGHT_TIMEOUT_S = 5
+    # A passed preflight is trusted by downAlbum for this long, then re-run
+    PREFLIGHT_MAX_AGE_S = 300
+    # Size estimation fallbacks when the API/playlist gives no duration or bitrate
+    DEFAULT_ESTIMATE_KBPS = 128
+    DEFAULT_EPISODE_DURATION_S = 1200
+
     def __init__(self, url: str,
                  # cookies_file_path is for the server-side default cookies.json
                  cookies_file_path: str | None = None, 
                  # user_cookies_list is for cookies provided by the user via the web UI
                  user_cookies_list: List[Dict[str, Any]] | None = None, 
-                 show_content_download_root_dir: Path = Path("Downloaded_Content_Default_Root") 
+                 show_content_download_root_dir: Path = Path("Downloaded_Content_Default_Root"),
+                 # variant_policy/target_kbps choose which HLS variant ffmpeg is given
+                 variant_policy: str = "highest",
+                 target_kbps: float | None = None
                 ):
         """
         Initializes the KuKu downloader with the show URL and configurations.
         User-provided cookies take precedence.
         """
+        if variant_policy not in KuKu.VARIANT_POLICIES:
+            raise ValueError(f"❌ Unknown variant policy '{variant_policy}'. Use one of: {', '.join(KuKu.VARIANT_POLICIES)}.")
+        if variant_policy == "closest" and (not target_kbps or target_kbps <= 0):
+            raise ValueError("❌ Variant policy 'closest' requires a positive target_kbps.")
         self.showID = urlparse(url).path.split('/')[-1]
         self.session = requests.Session()
         self.current_show_url = url 
@@ -36,6 +62,14 @@ class KuKu:
         self.album_path: Path | None = None 
         self.metadata_filename_generated: str | None = None # Though export is removed, keep for potential future internal use
 
+        self.auth_preflight_passed_at: float | None = None
+        self.variant_policy = variant_policy
+        self.target_kbps = target_kbps
+        # Variants of the sampled master playlist (same ladder for every episode of a show)
+        self.hls_variants: List[Dict[str, Any]] = []
+        # KuKu.episode_key(ep) -> {"title", "selected": {...} | None, "estimated_size_bytes", "already_exists"}
+        self.variant_selections: Dict[str, Dict[str, Any]] = {}
+
         self.session.headers.update({
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
             "Referer": "https://kukufm.com/",
@@ -242,6 +276,176 @@ class KuKu:
         if header_string: print(f"SERVER LOG: _ffmpeg_headers: Generated FFMPEG Cookie header: {header_string[:100]}...")
         return header_string
 
+    @staticmethod
+    def episode_duration_seconds(ep_data: dict) -> float:
+        """Best-effort episode duration (seconds) from the episode API payload; 0 if unknown."""
+        content_info = ep_data.get('content', {}) or {}
+        for raw in (ep_data.get('duration_s'), ep_data.get('duration'), content_info.get('duration_s'), content_info.get('duration')):
+            try:
+                if raw is not None and float(raw) > 0: return float(raw)
+            except (TypeError, ValueError): continue
+        return 0.0
+
+    @staticmethod
+    def estimate_size_bytes(bandwidth_bps: int | None, duration_s: float) -> int | None:
+        """Estimated stream size for a bitrate (bits/s) over a duration; None if either is unknown."""
+        if not bandwidth_bps or duration_s <= 0: return None
+        return int(bandwidth_bps * duration_s / 8)
+
+    @staticmethod
+    def _hls_bandwidth(attrs: Dict[str, str]) -> int:
+        """AVERAGE-BANDWIDTH, else BANDWIDTH (bits/s); decimals are rounded, malformed values skipped, 0 if none is usable."""
+        for key in ("AVERAGE-BANDWIDTH", "BANDWIDTH"):
+            try: return max(0, round(float(attrs[key])))
+            except (KeyError, ValueError, OverflowError): continue
+        return 0
+
+    @staticmethod
+    def parse_hls_master(playlist_text: str, playlist_url: str) -> List[Dict[str, Any]]:
+        """
+        Parses the #EXT-X-STREAM-INF entries of an HLS master playlist.
+        Returns an empty list for media playlists (no variants to choose from).
+        """
+        variants, pending_attrs = [], None
+        for line in playlist_text.splitlines():
+            line = line.strip()
+            if not line: continue
+            if line.startswith("#EXT-X-STREAM-INF:"):
+                pending_attrs = dict(re.findall(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)', line.split(":", 1)[1]))
+                pending_attrs = {k: v.strip('"') for k, v in pending_attrs.items()}
+            elif pending_attrs is not None and not line.startswith("#"):
+                bandwidth = KuKu._hls_bandwidth(pending_attrs)
+                variants.append({
+                    "url": urljoin(playlist_url, line),
+                    "bandwidth": bandwidth,
+                    "kbps": round(bandwidth / 1000, 1),
+                    "codecs": pending_attrs.get("CODECS", ""),
+                })
+                pending_attrs = None
+        return variants
+
+    def select_hls_variant(self, variants: List[Dict[str, Any]]) -> Dict[str, Any] | None:
+        """Picks one variant according to self.variant_policy."""
+        if not variants: return None
+        if self.variant_policy == "lowest": return min(variants, key=lambda v: v["bandwidth"])
+        if self.variant_policy == "closest":
+            target_bps = float(self.target_kbps) * 1000
+            return min(variants, key=lambda v: (abs(v["bandwidth"] - target_bps), v["bandwidth"]))
+        return max(variants, key=lambda v: v["bandwidth"])
+
+    def _fetch_hls_variants(self, playlist_url: str) -> List[Dict[str, Any]]:
+        """Downloads the playlist at playlist_url and returns its variants ([] on error or media playlist)."""
+        try:
+            r = requests.get(playlist_url, headers={"User-Agent": self.session.headers.get("User-Agent")}, cookies=self._cloudfront_cookies() or None, timeout=15)
+            r.raise_for_status()
+            return KuKu.parse_hls_master(r.text, r.url or playlist_url)
+        except Exception as e:
+            print(f"SERVER LOG: ⚠️ Could not read HLS master playlist ({playlist_url[:80]}...): {e}")
+            return []
+
+    @staticmethod
+    def episode_workers() -> int:
+        """Number of episodes downAlbum downloads in parallel."""
+        return min(os.cpu_count() or 1, 2)
+
+    @staticmethod
+    def episode_key(ep_data: dict) -> str:
+        """Stable per-episode key (API id, else index); titles are not unique within a show."""
+        return str(ep_data.get('id') or ep_data.get('index', 0))
+
+    @staticmethod
+    def _variant_summary(variant: Dict[str, Any] | None) -> Dict[str, Any] | None:
+        return {k: variant[k] for k in ("bandwidth", "kbps", "codecs")} if variant else None
+
+    def _resolve_stream_url(self, ep_data: dict, episode_title: str, stream_url: str) -> str:
+        """Applies the variant policy to stream_url and records the choice in self.variant_selections."""
+        variants = self._fetch_hls_variants(stream_url)
+        if variants and not self.hls_variants: self.hls_variants = [KuKu._variant_summary(v) for v in variants]
+        selected = self.select_hls_variant(variants)
+        duration_s = KuKu.episode_duration_seconds(ep_data)
+        self.variant_selections[KuKu.episode_key(ep_data)] = {
+            "title": episode_title,
+            "selected": KuKu._variant_summary(selected),
+            "estimated_size_bytes": KuKu.estimate_size_bytes(selected["bandwidth"] if selected else None, duration_s),
+            "already_exists": False,
+        }
+        return selected["url"] if selected else stream_url
+
+    def _cloudfront_cookies(self) -> Dict[str, str]:
+        """CloudFront signed-cookie triple from the session (only the ones present)."""
+        return {k:v for k,v in {n:self.session.cookies.get(n) for n in ["CloudFront-Policy","CloudFront-Signature","CloudFront-Key-Pair-Id"]}.items() if v}
+
+    @staticmethod
+    def decode_cloudfront_policy_expiry(policy_cookie: str | None) -> int | None:
+        """Epoch expiry (AWS:EpochTime of DateLessThan) from a CloudFront-Policy cookie; None if undecodable."""
+        if not policy_cookie: return None
+        try:
+            # CloudFront's URL-safe base64: '-' for '+', '_' for '=', '~' for '/'
+            raw = policy_cookie.replace('-', '+').replace('_', '=').replace('~', '/')
+            policy = json.loads(base64.b64decode(raw + '=' * (-len(raw) % 4)))
+            expiries = [st.get('Condition', {}).get('DateLessThan', {}).get('AWS:EpochTime') for st in policy.get('Statement', [])]
+            expiries = [int(e) for e in expiries if e is not None]
+            return min(expiries) if expiries else None
+        except Exception:
+            return None
+
+    def preflight_auth(self, episodes: List[dict], workers: int) -> Dict[str, Any]:
+        """
+        Checks, before any ffmpeg is started, that auth will hold for the whole show:
+        probes one playlist and one segment with the session's CloudFront cookies and
+        compares the policy expiry with the estimated download duration.
+        Raises AuthPreflightError on failure; returns a summary dict on success.
+        """
+        started = time.time()
+        total_audio_s = sum(KuKu.episode_duration_seconds(ep) or KuKu.DEFAULT_EPISODE_DURATION_S for ep in episodes)
+        est_download_s = int(total_audio_s / (KuKu.PREFLIGHT_SPEED_FACTOR * max(workers, 1)))
+        summary: Dict[str, Any] = {"estimated_download_seconds": est_download_s, "policy_expires_at": None}
+
+        expiry = KuKu.decode_cloudfront_policy_expiry(self._cloudfront_cookies().get("CloudFront-Policy"))
+        summary["policy_expires_at"] = expiry
+        if expiry is not None:
+            remaining_s = expiry - int(started)
+            if remaining_s <= 0:
+                raise AuthPreflightError("CloudFront cookies have expired. Please export fresh cookies and try again.")
+            if remaining_s < est_download_s + KuKu.PREFLIGHT_EXPIRY_MARGIN_S:
+                raise AuthPreflightError(f"CloudFront cookies expire in {remaining_s // 60} min, but this show needs about "
+                                         f"{est_download_s // 60} min to download. Please export fresh cookies and try again.")
+
+        sample_url = next((u for ep in episodes if (u := (ep.get('content', {}) or {}).get('hls_url') or (ep.get('content', {}) or {}).get('premium_audio_url'))), None)
+        if not sample_url:
+            print("SERVER LOG: ⚠️ Auth preflight: no episode has a stream URL to probe.")
+            return summary
+
+        h = {"User-Agent": self.session.headers.get("User-Agent")}
+        cf_c = self._cloudfront_cookies() or None
+        try:
+            playlist_url = sample_url
+            r = requests.get(playlist_url, headers=h, cookies=cf_c, timeout=KuKu.PREFLIGHT_TIMEOUT_S)
+            if r.status_code in (401, 403):
+                raise AuthPreflightError(f"Stream playlist was refused (HTTP {r.status_code}). Your cookies are missing, expired or lack access to this show.")
+            r.raise_for_status()
+            if variant := self.select_hls_variant(KuKu.parse_hls_master(r.text, r.url or playlist_url)):
+                playlist_url = variant["url"]
+                r = requests.get(playlist_url, headers=h, cookies=cf_c, timeout=KuKu.PREFLIGHT_TIMEOUT_S)
+                if r.status_code in (401, 403):
+                    raise AuthPreflightError(f"Variant playlist was refused (HTTP {r.status_code}). Your cookies are missing, expired or lack access to this show.")
+                r.raise_for_status()
+            segment = next((ln.strip() for ln in r.text.splitlines() if ln.strip() and not ln.startswith("#")), None)
+            if segment:
+                seg_r = requests.get(urljoin(r.url or playlist_url, segment), headers={**h, "Range": "bytes=0-1023"}, cookies=cf_c,
+                                     timeout=KuKu.PREFLIGHT_TIMEOUT_S, stream=True)
+                seg_r.close()
+                if seg_r.status_code in (401, 403):
+                    raise AuthPreflightError(f"Audio segment was refused (HTTP {seg_r.status_code}). Your cookies are missing, expired or lack access to this show.")
+        except AuthPreflightError:
+            raise
+        except requests.exceptions.RequestException as e:
+            # Not an auth verdict: let the episode downloads try (and report) on their own.
+            print(f"SERVER LOG: ⚠️ Auth preflight probe inconclusive: {e}")
+        self.auth_preflight_passed_at = time.time()
+        print(f"SERVER LOG: ✅ Auth preflight passed in {time.time() - started:.2f}s (est. download {est_download_s}s, policy expiry {expiry}).")
+        return summary
+
     # --- Method download_episode remains largely the same (no conversion logic) ---
     def download_episode(self, ep_data: dict, album_folder_path: Path, cover_file_path: Path | None):
         episode_title_cleaned = KuKu.clean(ep_data.get('title', 'Untitled Episode'))
@@ -260,8 +464,12 @@ class KuKu:
 
         if audio_p.exists() and audio_p.stat().st_size > 1024: 
             # print(f"SERVER LOG: ✅ Ep '{episode_title_cleaned}': Already exists.") # Logged by callback
+            self.variant_selections[KuKu.episode_key(ep_data)] = {"title": episode_title_cleaned, "selected": None,
+                                                                  "estimated_size_bytes": audio_p.stat().st_size, "already_exists": True}
             return episode_title_cleaned, True
 
+        hls_stream_url = self._resolve_stream_url(ep_data, episode_title_cleaned, hls_stream_url)
+
         ffmpeg_cmd_headers = self._ffmpeg_headers(); 
         cmd = ["ffmpeg","-y"]
         if ffmpeg_cmd_headers: cmd.extend(["-headers", ffmpeg_cmd_headers])
@@ -328,8 +536,7 @@ class KuKu:
         try:
             print(f"SERVER LOG: 🖼️ Downloading cover: {image_url}")
             h={"User-Agent":self.session.headers.get("User-Agent"),"Referer":self.session.headers.get("Referer"),"Accept":"image/*"}
-            cf_c={k:v for k,v in {n:self.session.cookies.get(n) for n in ["CloudFront-Policy","CloudFront-Signature","CloudFront-Key-Pair-Id"]}.items() if v}
-            r=requests.get(image_url,stream=True,headers=h,cookies=cf_c or None,timeout=30); r.raise_for_status()
+            r=requests.get(image_url,stream=True,headers=h,cookies=self._cloudfront_cookies() or None,timeout=30); r.raise_for_status()
             ct,cl=r.headers.get("Content-Type","").lower(),int(r.headers.get("Content-Length",0))
             if not ct.startswith("image/") or cl<100: raise ValueError(f"Invalid cover(type:{ct},size:{cl})")
             with open(save_to_path,'wb') as f: 
@@ -342,17 +549,13 @@ class KuKu:
     # --- export_metadata_file method removed as per user request ---
 
     # --- Method downAlbum (with episode_status_callback) remains largely the same ---
-    def downAlbum(self, episode_status_callback: Callable[[str, bool, int, int, str], None] | None = None):
+    def album_folder_path(self) -> Path:
+        """Folder the show's episodes are written to (same layout downAlbum uses)."""
         album_folder_name_cleaned = f"{self.metadata['title']} ({self.metadata['date'][:4] if self.metadata['date'] else 'ND'}) [{self.metadata['lang']}]"
-        self.album_path = self.show_content_download_root_dir / self.clean(self.metadata['lang']) / self.clean(self.metadata['type']) / self.clean(album_folder_name_cleaned)
-        self.album_path.mkdir(parents=True, exist_ok=True)
-        print(f"SERVER LOG: 📂 Album content will be saved to: {self.album_path.resolve()}")
-
-        cover_ext = ".png"; img_url_l = self.metadata['image'].lower()
-        if ".jpg" in img_url_l or ".jpeg" in img_url_l: cover_ext = ".jpg"
-        cover_p = self.album_path / f"cover{cover_ext}"
-        actual_cover_p = cover_p if self.download_cover(self.metadata['image'], cover_p) else None
+        return self.show_content_download_root_dir / self.clean(self.metadata['lang']) / self.clean(self.metadata['type']) / self.clean(album_folder_name_cleaned)
 
+    def fetch_all_episodes(self) -> List[dict]:
+        """Fetches every page of the show's episode list from the API."""
         all_eps_api, page = [], 1
         print("SERVER LOG: 🔄 Fetching all episode details from API...")
         while True:
@@ -365,6 +568,47 @@ class KuKu:
             all_eps_api.extend(eps_pg)
             if not data.get('has_more',False): print("SERVER LOG: Last page of episodes reached."); break
             page += 1
+        return all_eps_api
+
+    def estimate_download_size_bytes(self, episodes: List[dict]) -> int:
+        """
+        Estimates the on-disk size of the show's audio from episode durations and the
+        bitrate of the variant the policy picks on one sampled master playlist.
+        Falls back to conservative defaults when durations or bitrates are unknown.
+        """
+        bandwidth_bps = KuKu.DEFAULT_ESTIMATE_KBPS * 1000
+        sample_url = next((u for ep in episodes if (u := (ep.get('content', {}) or {}).get('hls_url') or (ep.get('content', {}) or {}).get('premium_audio_url'))), None)
+        if sample_url and (variants := self._fetch_hls_variants(sample_url)):
+            self.hls_variants = [KuKu._variant_summary(v) for v in variants]
+            if (variant := self.select_hls_variant(variants)) and variant["bandwidth"]: bandwidth_bps = variant["bandwidth"]
+        total_s = sum(KuKu.episode_duration_seconds(ep) or KuKu.DEFAULT_EPISODE_DURATION_S for ep in episodes)
+        return KuKu.estimate_size_bytes(bandwidth_bps, total_s) or 0
+
+    def downAlbum(self, episode_status_callback: Callable[[str, bool, int, int, str], None] | None = None,
+                  episodes: List[dict] | None = None):
+        # Callers that already fetched the episode list (e.g. for size estimation) pass it in
+        all_eps_api = episodes if episodes is not None else self.fetch_all_episodes()
+
+        # Auth preflight comes before any folder or cover is written so a failure is fast and leaves nothing behind.
+        # Skipped when the caller just ran it (e.g. before queueing for disk space).
+        workers = KuKu.episode_workers()
+        try:
+            if not self.auth_preflight_passed_at or time.time() - self.auth_preflight_passed_at > KuKu.PREFLIGHT_MAX_AGE_S:
+                self.preflight_auth(all_eps_api, workers)
+        except AuthPreflightError as e:
+            print(f"SERVER LOG: ❌ Auth preflight failed, no episodes will be started: {e}")
+            if episode_status_callback:
+                 episode_status_callback(episode_title="Auth Preflight", success=False, processed_count=0, total_episodes=len(all_eps_api), status_message=str(e))
+            raise
+
+        self.album_path = self.album_folder_path()
+        self.album_path.mkdir(parents=True, exist_ok=True)
+        print(f"SERVER LOG: 📂 Album content will be saved to: {self.album_path.resolve()}")
+
+        cover_ext = ".png"; img_url_l = self.metadata['image'].lower()
+        if ".jpg" in img_url_l or ".jpeg" in img_url_l: cover_ext = ".jpg"
+        cover_p = self.album_path / f"cover{cover_ext}"
+        actual_cover_p = cover_p if self.download_cover(self.metadata['image'], cover_p) else None
         
         if not all_eps_api: 
             print("SERVER LOG: ❌ No episodes found for this show after API fetch.")
@@ -375,11 +619,10 @@ class KuKu:
         total_episodes_to_process = len(all_eps_api)
         print(f"SERVER LOG: 🎬 Total episodes to process: {total_episodes_to_process}")
         if self.metadata['nEpisodes']!=total_episodes_to_process: self.metadata['nEpisodes']=total_episodes_to_process
-        
+
         ok_dl_count, fail_titles_list = 0,[]
         processed_episodes_count = 0
-        workers = min(os.cpu_count() or 1, 2) 
-        print(f"SERVER LOG: Starting ThreadPoolExecutor with {workers} workers.")
+        print(f"SERVER LOG: Starting ThreadPoolExecutor with {workers} workers (HLS variant policy: {self.variant_policy}{f' @ {self.target_kbps} kbps' if self.variant_policy == 'closest' else ''}).")
         
         with ThreadPoolExecutor(max_workers=workers) as executor:
             futures_map = {executor.submit(self.download_episode, ep, self.album_path, actual_cover_p): ep for ep in all_eps_api}
@@ -7,6 +7,8 @@ document.addEventListener('DOMContentLoaded', function() {
     
     const statusMessagesDiv = document.getElementById('statusMessages');
     const kukuUrlInput = document.getElementById('kuku_url');
+    const variantPolicySelect = document.getElementById('variant_policy');
+    const targetKbpsInput = document.getElementById('target_kbps');
     const submitButton = document.getElementById('submitDownloadBtn');
     
     const downloadProcessDisplay = document.getElementById('downloadProcessDisplay');
@@ -272,7 +274,11 @@ document.addEventListener('DOMContentLoaded', function() {
         try {
             const response = await fetch('/download', {
                 method: 'POST', headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ kuku_url: kukuUrl }), // Only send URL now
+                body: JSON.stringify({
+                    kuku_url: kukuUrl,
+                    variant_policy: variantPolicySelect ? variantPolicySelect.value : 'highest',
+                    target_kbps: targetKbpsInput && targetKbpsInput.value ? Number(targetKbpsInput.value) : null
+                }),
             });
             const result = await response.json();
 
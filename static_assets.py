@@ -0,0 +1,116 @@
+# static_assets.py
+import gzip
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+try:
+    import brotli # Optional: only gzip variants are generated without it
+except ImportError:
+    brotli = None
+
+try:
+    from PIL import Image # Optional: responsive image sets are skipped without Pillow
+except ImportError:
+    Image = None
+
+
+class StaticAssetManifest:
+    """
+    Build-free asset pipeline run once at startup: every file under static_dir gets a
+    content-hashed name (style.css -> style.<hash>.css) that can be cached forever,
+    text assets get pre-compressed .gz/.br copies, and images get resized variants
+    for srcset. Generated files live in build_dir; sources are never modified.
+    """
+    COMPRESSIBLE_SUFFIXES = {'.css', '.js', '.svg', '.html', '.xml', '.txt', '.json'}
+    RESPONSIVE_SUFFIXES = {'.png', '.jpg', '.jpeg', '.webp'}
+    RESPONSIVE_WIDTHS = (480, 960, 1440)
+    # Preferred first; matched against the request's Accept-Encoding
+    ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+    def __init__(self, static_dir: Path, build_dir: Path):
+        self.static_dir = Path(static_dir)
+        self.build_dir = Path(build_dir)
+        self.source_to_hashed: Dict[str, str] = {} # "css/style.css" -> "css/style.<hash>.css"
+        self.hashed_to_path: Dict[str, Path] = {} # fingerprinted name -> file to serve
+        self.srcsets: Dict[str, List[Tuple[str, int]]] = {} # "images/x.png" -> [(fingerprinted name, width), ...]
+
+    @staticmethod
+    def _fingerprint(rel_path: str, digest: str, tag: str = "") -> str:
+        p = Path(rel_path)
+        return (p.parent / f"{p.stem}.{digest}{tag}{p.suffix}").as_posix()
+
+    def build(self) -> "StaticAssetManifest":
+        self.build_dir.mkdir(parents=True, exist_ok=True)
+        for src in sorted(self.static_dir.rglob('*')):
+            if not src.is_file() or any(part.startswith('.') for part in src.relative_to(self.static_dir).parts): continue
+            rel = src.relative_to(self.static_dir).as_posix()
+            data = src.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            hashed = self._fingerprint(rel, digest)
+            self.source_to_hashed[rel] = hashed
+            self.hashed_to_path[hashed] = src
+            suffix = src.suffix.lower()
+            if suffix in self.COMPRESSIBLE_SUFFIXES: self._precompress(hashed, data)
+            if suffix in self.RESPONSIVE_SUFFIXES: self._build_srcset(rel, digest, src)
+        return self
+
+    def _precompress(self, hashed: str, data: bytes):
+        gz_path = self.build_dir / f"{hashed}.gz"
+        if not gz_path.exists():
+            gz_path.parent.mkdir(parents=True, exist_ok=True)
+            gz_path.write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None and not (br_path := self.build_dir / f"{hashed}.br").exists():
+            br_path.write_bytes(brotli.compress(data, quality=11))
+
+    def _build_srcset(self, rel: str, digest: str, src: Path):
+        if Image is None: return
+        try:
+            with Image.open(src) as img:
+                entries = []
+                for width in self.RESPONSIVE_WIDTHS:
+                    if width >= img.width: break
+                    variant = self._fingerprint(rel, digest, f".w{width}")
+                    out = self.build_dir / variant
+                    if not out.exists():
+                        out.parent.mkdir(parents=True, exist_ok=True)
+                        img.resize((width, round(img.height * width / img.width)), Image.LANCZOS).save(out, optimize=True)
+                    self.hashed_to_path[variant] = out
+                    entries.append((variant, width))
+                entries.append((self._fingerprint(rel, digest), img.width))
+                self.srcsets[rel] = entries
+        except Exception as e:
+            print(f"SERVER LOG: ⚠️ Could not build responsive images for '{rel}': {e}")
+
+    def url_name(self, rel: str) -> str:
+        """Fingerprinted name for a static file (the plain name if it is unknown)."""
+        return self.source_to_hashed.get(rel, rel)
+
+    def srcset_names(self, rel: str) -> List[Tuple[str, int]]:
+        return self.srcsets.get(rel, [])
+
+    def resolve(self, name: str, accept_encoding: str = "") -> Tuple[Path, str | None] | None:
+        """(file to send, Content-Encoding or None) for a fingerprinted name; None if it is not one."""
+        path = self.hashed_to_path.get(name)
+        if path is None: return None
+        qvalues = self.parse_accept_encoding(accept_encoding)
+        for encoding, ext in self.ENCODINGS:
+            if qvalues.get(encoding, qvalues.get('*', 0)) > 0 and (variant := self.build_dir / f"{name}{ext}").exists():
+                return variant, encoding
+        return path, None
+
+    @staticmethod
+    def parse_accept_encoding(header: str) -> Dict[str, float]:
+        """{coding: q} from an Accept-Encoding header; q=0 means the coding is refused."""
+        qvalues = {}
+        for part in header.split(','):
+            coding, *params = [p.strip() for p in part.split(';')]
+            if not coding: continue
+            q = 1.0
+            for param in params:
+                key, _, value = param.partition('=')
+                if key.strip().lower() == 'q':
+                    try: q = float(value)
+                    except ValueError: q = 0.0
+            qvalues[coding.lower()] = q
+        return qvalues
@@ -0,0 +1,72 @@
+# synthetic_load.py
+import random
+import time
+import zlib
+from pathlib import Path
+from typing import Callable, Any, List, Dict
+from urllib.parse import urlparse, parse_qs
+
+from kuku_downloader import KuKu
+
+
+class SyntheticShow:
+    """
+    Network-free stand-in for KuKu used to benchmark the web process under load
+    (see bench_status_latency.py). Exposes the parts of the KuKu interface the task
+    wrapper and album_job use; "downloading" an episode is CPU-bound Python work
+    (KuKu.clean regex passes + deflate) that writes a compressible file, so the ZIP
+    step does real work too. Only used when the app runs with KUKU_SYNTHETIC_LOAD=1.
+
+    URL form: synthetic://<name>?episodes=20&seconds=60&mb=2
+    """
+    URL_PREFIX = "synthetic://"
+
+    def __init__(self, url: str, show_content_download_root_dir: Path):
+        parsed = urlparse(url)
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        self.showID = KuKu.clean(parsed.netloc or "show")
+        self.n_episodes = max(1, int(query.get("episodes", 20)))
+        self.seconds = max(1.0, float(query.get("seconds", 60)))
+        self.episode_bytes = int(float(query.get("mb", 2)) * 1024**2)
+        self.show_content_download_root_dir = Path(show_content_download_root_dir)
+        self.album_path: Path | None = None
+        self.hls_variants: List[Dict[str, Any]] = []
+        self.variant_selections: Dict[str, Dict[str, Any]] = {}
+        self.metadata = {'title': f"Synthetic {self.showID}", 'nEpisodes': self.n_episodes}
+
+    def album_folder_path(self) -> Path:
+        return self.show_content_download_root_dir / "_synthetic" / "Synthetic" / self.showID # lang/type/show, like KuKu
+
+    def fetch_all_episodes(self) -> List[dict]:
+        return [{'id': f"{self.showID}-{i}", 'index': i, 'title': f"Episode {i}: Part/{i}*?"} for i in range(1, self.n_episodes + 1)]
+
+    def preflight_auth(self, episodes: List[dict], workers: int) -> Dict[str, Any]:
+        return {"estimated_download_seconds": int(self.seconds), "policy_expires_at": None}
+
+    def estimate_download_size_bytes(self, episodes: List[dict]) -> int:
+        return self.episode_bytes * len(episodes)
+
+    def _burn_episode(self, ep: dict, out_path: Path, budget_s: float):
+        rng = random.Random(ep['index'])
+        words = [f"{rng.choice(['Chapter', 'Part', 'Ep'])}: {rng.random():.6f} <{i}> / *|?" for i in range(256)]
+        deadline = time.time() + budget_s
+        lines: List[str] = []
+        written = 0
+        while time.time() < deadline or written < self.episode_bytes:
+            chunk = "\n".join(KuKu.clean(w) for w in words)
+            zlib.compress(chunk.encode('utf-8'), 6) # deflate pass, like the ZIP step
+            if written < self.episode_bytes:
+                lines.append(chunk); written += len(chunk)
+        out_path.write_text("\n".join(lines), encoding='utf-8')
+
+    def downAlbum(self, episode_status_callback: Callable[..., None] | None = None, episodes: List[dict] | None = None):
+        episodes = episodes if episodes is not None else self.fetch_all_episodes()
+        self.album_path = self.album_folder_path()
+        self.album_path.mkdir(parents=True, exist_ok=True)
+        per_episode_s = self.seconds / len(episodes)
+        for processed, ep in enumerate(episodes, start=1):
+            title = KuKu.clean(ep['title'])
+            self._burn_episode(ep, self.album_path / f"{ep['index']:03d}. {title}.txt", per_episode_s)
+            if episode_status_callback:
+                episode_status_callback(episode_title=title, success=True, processed_count=processed,
+                                        total_episodes=len(episodes), status_message=f"Synthetic episode done: {title}")
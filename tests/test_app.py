@@ -0,0 +1,77 @@
+# tests/test_app.py
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# app.py reads its storage root at import time
+os.environ.setdefault('RENDER_DISK_MOUNT_PATH', tempfile.mkdtemp(prefix="kuku_test_"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest
+
+import app as app_module
+from kuku_downloader import KuKu
+from synthetic_load import SyntheticShow
+
+
+class StubKuKu(SyntheticShow, KuKu):
+    """KuKu with the network replaced by SyntheticShow; reports one HLS variant selection per episode."""
+    release = None # set to a threading.Event to hold the task in preflight
+
+    def __init__(self, url, cookies_file_path=None, user_cookies_list=None, show_content_download_root_dir=None,
+                 variant_policy="highest", target_kbps=None):
+        SyntheticShow.__init__(self, "synthetic://stub?episodes=2&seconds=1&mb=0.01", show_content_download_root_dir)
+
+    def preflight_auth(self, episodes, workers):
+        if self.release is not None: self.release.wait(timeout=10)
+        return SyntheticShow.preflight_auth(self, episodes, workers)
+
+    def downAlbum(self, episode_status_callback=None, episodes=None):
+        def record_variant(**kw):
+            self.variant_selections[f"{self.showID}-{kw['processed_count']}"] = {"bandwidth": 128000, "estimated_size_bytes": 1000}
+            episode_status_callback(**kw)
+        SyntheticShow.downAlbum(self, episode_status_callback=record_variant, episodes=episodes)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app_module, "KuKu", StubKuKu)
+    monkeypatch.setattr(StubKuKu, "release", None)
+    app_module.download_tasks_status.clear()
+    return app_module.app.test_client()
+
+
+def wait_for_status(client, task_id, statuses, timeout=20.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        info = client.get(f"/status/{task_id}").get_json()
+        if info["status"] in statuses: return info
+        time.sleep(0.05)
+    raise AssertionError(f"task {task_id} still '{info['status']}' after {timeout}s")
+
+
+def test_download_runs_to_complete_with_variant_selections(client):
+    resp = client.post("/download", json={"kuku_url": "https://kukufm.com/show/stub"})
+    assert resp.status_code == 200
+    task_id = resp.get_json()["task_id"]
+
+    info = wait_for_status(client, task_id, ("complete", "error"))
+    assert info["status"] == "complete", info["message"]
+    assert info["zip_filename"] and (app_module.ZIP_STORAGE_DIR / info["zip_filename"]).is_file()
+    assert len(info["variant_selections"]) == 2
+    assert info["estimated_total_bytes"] == 2000
+
+
+def test_duplicate_download_rejected_while_task_is_starting(client):
+    StubKuKu.release = threading.Event()
+    url = "https://kukufm.com/show/stub-dup"
+    first = client.post("/download", json={"kuku_url": url})
+    assert first.status_code == 200
+    try:
+        assert client.post("/download", json={"kuku_url": url}).status_code == 409
+    finally:
+        StubKuKu.release.set()
+    wait_for_status(client, first.get_json()["task_id"], ("complete", "error"))
@@ -0,0 +1,25 @@
+# tests/test_kuku_downloader.py
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from kuku_downloader import KuKu
+
+MASTER = """#EXTM3U
+#EXT-X-STREAM-INF:BANDWIDTH=64000,CODECS="mp4a.40.5"
+low/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=128000.5,AVERAGE-BANDWIDTH=abc
+mid/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=fast
+bad/index.m3u8
+"""
+
+
+def test_parse_hls_master_tolerates_malformed_bandwidth():
+    variants = KuKu.parse_hls_master(MASTER, "https://cdn.example.com/show/master.m3u8")
+    assert [v["url"] for v in variants] == ["https://cdn.example.com/show/low/index.m3u8",
+                                            "https://cdn.example.com/show/mid/index.m3u8",
+                                            "https://cdn.example.com/show/bad/index.m3u8"]
+    assert [v["bandwidth"] for v in variants] == [64000, 128000, 0]
+    assert variants[0]["codecs"] == "mp4a.40.5"